@@ -37,34 +37,30 @@ CONSTRUCTOR_SIGNING_CERTIFICATE:
 CONSTRUCTOR_PFX_CERTIFICATE_PASSWORD:
     Password to unlock the PFX certificate. This is not used here but
     it might be needed by constructor.
+CONSTRUCTOR_CACHE:
+    Directory where constructor keeps the downloaded packages. This is
+    not used here but constructor reads it as the default `--cache-dir`;
+    the CI workflow points it to a directory persisted with `actions/cache`.
+CONSTRUCTOR_VERBOSE:
+    also print the output of `conda config --show-sources` and
+    `conda info` before building. Off by default because each of
+    these spawns a full conda process.
 """
 
-import atexit
-import importlib.metadata
+import importlib.util
 import json
 import os
 import platform
+import re
 import sys
-import zipfile
 from argparse import ArgumentParser
 from functools import lru_cache, partial
 from pathlib import Path
 from shutil import which
 from subprocess import check_call, check_output
-from tempfile import NamedTemporaryFile
-from textwrap import dedent, indent
+from tempfile import TemporaryDirectory, gettempdir
+from textwrap import indent
 
-try:
-    from importlib.resources import files as resources_files
-except ImportError:
-    # python < 3.9
-    from importlib_resources import files as resources_files
-
-import requests
-from ruamel.yaml import YAML
-
-yaml = YAML()
-yaml.indent(mapping=2)
 indent4 = partial(indent, prefix="    ")
 
 APP = os.environ.get("CONSTRUCTOR_APP_NAME", "napari")
@@ -106,6 +102,88 @@ CONDA_TOOL_DEPS = (
     "pip",
 )
 
+# construct.yaml keys that depend neither on the napari version
+# nor on the location of the napari repository
+STATIC_DEFINITIONS = {
+    "name": APP,
+    "company": "Napari",
+    "reverse_domain_identifier": "org.napari",
+    # tuples, so the shared constants can't be mutated through a result
+    "conda_default_channels": ("conda-forge",),
+    "initialize_conda": False,
+    "initialize_by_default": False,
+    "register_envs": False,
+}
+if LINUX:
+    PLATFORM_DEFINITIONS = {
+        "installer_type": "sh",
+    }
+elif MACOS:
+    PLATFORM_DEFINITIONS = {
+        "default_location_pkg": "Library",
+        "installer_type": "pkg",
+        "progress_notifications": True,
+        "conclusion_text": "",
+        "readme_text": "",
+    }
+else:  # WINDOWS
+    PLATFORM_DEFINITIONS = {
+        "conda_default_channels": ("conda-forge", "defaults"),
+        "register_python": False,
+        "register_python_default": False,
+        "check_path_length": False,
+        "installer_type": "exe",
+    }
+
+
+# characters that json.dumps(ensure_ascii=False) leaves as-is but YAML
+# either rejects (DEL, C1 controls, noncharacters) or folds as line breaks
+_YAML_UNSAFE_CHARS = re.compile("[\x7f-\x9f\u2028\u2029\ufeff\ufffe\uffff]")
+
+
+def _yaml_scalar(value):
+    # non-ASCII text is written verbatim; with ensure_ascii=True characters
+    # outside the BMP would become surrogate pairs that YAML can't decode
+    text = json.dumps(value, ensure_ascii=False)
+    return _YAML_UNSAFE_CHARS.sub(lambda m: f"\\u{ord(m.group()):04x}", text)
+
+
+_PLAIN_YAML_KEY = re.compile(r"[A-Za-z_][\w.-]*").fullmatch
+# words that YAML 1.1 loaders would turn into booleans or null
+_YAML_RESERVED_WORDS = {"y", "n", "yes", "no", "on", "off", "true", "false", "null"}
+
+
+def _render_yaml(data, prefix=""):
+    """
+    Render nested dicts/lists/tuples of JSON-compatible scalars as block-style YAML.
+
+    YAML is a superset of JSON, so scalars are emitted as JSON strings/literals
+    and are always quoted safely (Windows paths, `%VARS%`, empty strings...).
+    """
+    lines = []
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if not _PLAIN_YAML_KEY(key) or key.lower() in _YAML_RESERVED_WORDS:
+                key = _yaml_scalar(key)
+            if isinstance(value, (dict, list, tuple)) and value:
+                lines.append(f"{prefix}{key}:")
+                lines.append(_render_yaml(value, prefix + "  "))
+            else:
+                lines.append(f"{prefix}{key}: {_yaml_scalar(value)}")
+    else:
+        for item in data:
+            if isinstance(item, (dict, list, tuple)) and item:
+                # first line goes next to the dash, the rest is already aligned
+                lines.append(f"{prefix}- {_render_yaml(item, prefix + '  ').lstrip()}")
+            else:
+                lines.append(f"{prefix}- {_yaml_scalar(item)}")
+    return "\n".join(lines)
+
+
+def _dump_yaml(data):
+    """Render `data` as YAML text, keeping the insertion order of keys."""
+    return _render_yaml(data) + "\n"
+
 
 def _use_local():
     """
@@ -115,9 +193,41 @@ def _use_local():
     return os.environ.get("CONSTRUCTOR_USE_LOCAL")
 
 
+@lru_cache
+def _http_session():
+    """
+    HTTP session shared by all the network lookups in this script.
+
+    The CLI is invoked several times per CI job (`--version`, `--artifact-name`,
+    the build itself...), so if `requests-cache` is available the responses
+    are persisted on disk for an hour and reused across invocations.
+    """
+    # imported here so the CLI queries that never go online don't pay for it
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    try:
+        import requests_cache
+    except ImportError:
+        session = requests.Session()
+    else:
+        session = requests_cache.CachedSession(
+            cache_name=os.path.join(gettempdir(), "napari_installer_http"),
+            backend="sqlite",
+            expire_after=3600,
+        )
+    session.headers.update({"User-Agent": "napari-packaging"})
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(max_retries=retries))
+    return session
+
+
 @lru_cache
 def _version():
     if _use_local():
+        import importlib.metadata
+
         version = importlib.metadata.version("napari")
         if version is None:
             raise RuntimeError("Could not get napari version! Is it installed?")
@@ -134,15 +244,42 @@ def _version():
         return version
     else:
         # get latest published on conda-forge
-        r = requests.get("https://api.anaconda.org/package/conda-forge/napari")
+        r = _http_session().get("https://api.anaconda.org/package/conda-forge/napari")
         r.raise_for_status()
         return r.json()["latest_version"]
 
 
-OUTPUT_FILENAME = f"{APP}-{_version()}-{OS}-{ARCH}.{EXT}"
-INSTALLER_DEFAULT_PATH_STEM = os.environ.get(
-    "CONSTRUCTOR_INSTALLER_DEFAULT_PATH_STEM", f"{APP}-{_version()}"
-)
+@lru_cache
+def _output_filename(version=None):
+    if version is None:
+        version = _version()
+    return f"{APP}-{version}-{OS}-{ARCH}.{EXT}"
+
+
+@lru_cache
+def _installer_default_path_stem(version=None):
+    if version is None:
+        version = _version()
+    return os.environ.get("CONSTRUCTOR_INSTALLER_DEFAULT_PATH_STEM", f"{APP}-{version}")
+
+
+def _napari_logo_path():
+    # find_spec locates the package without executing it,
+    # so we don't pay for the (slow) napari import here
+    spec = importlib.util.find_spec("napari")
+    if spec is None or spec.origin is None:
+        raise RuntimeError("Could not find napari! Is it installed?")
+    return Path(spec.origin).parent / "resources" / "logo.png"
+
+
+# installer type -> (filename, canvas size, logo size, logo position)
+BACKGROUND_IMAGES = {
+    "exe": (
+        ("napari_164x314.png", (164, 314), (101, 101), (32, 180)),
+        ("napari_150x57.png", (150, 57), (44, 44), (8, 6)),
+    ),
+    "pkg": (("napari_1227x600.png", (1227, 600), (148, 148), (95, 418)),),
+}
 
 
 def _generate_background_images(installer_type, outpath="./", napari_repo=HERE):
@@ -151,69 +288,76 @@ def _generate_background_images(installer_type, outpath="./", napari_repo=HERE):
         # shell installers are text-based, no graphics
         return
 
-    from PIL import Image
-
-    logo_path = resources_files("napari") / "resources/logo.png"
-    logo = Image.open(logo_path, "r")
+    pending = [
+        (Path(outpath, filename), size, logo_size, position)
+        for kind, images in BACKGROUND_IMAGES.items()
+        if installer_type in (kind, "all")
+        for filename, size, logo_size, position in images
+    ]
+    if not pending:
+        # nothing to draw for this installer type
+        return
 
-    global clean_these_files
+    from concurrent.futures import ThreadPoolExecutor
 
-    if installer_type in ("exe", "all"):
-        sidebar = Image.new("RGBA", (164, 314), (0, 0, 0, 0))
-        sidebar.paste(logo.resize((101, 101)), (32, 180))
-        output = Path(outpath, "napari_164x314.png")
-        sidebar.save(output, format="png")
-        atexit.register(os.unlink, output)
+    from PIL import Image
 
-        banner = Image.new("RGBA", (150, 57), (0, 0, 0, 0))
-        banner.paste(logo.resize((44, 44)), (8, 6))
-        output = Path(outpath, "napari_150x57.png")
-        banner.save(output, format="png")
-        atexit.register(os.unlink, output)
+    logo = Image.open(_napari_logo_path(), "r").convert("RGBA")
+    # one high-quality downsample shared by every target size, so the
+    # full-resolution logo is resampled only once
+    logo = logo.resize((256, 256), Image.Resampling.LANCZOS)
+    logos = {
+        logo_size: logo.resize(logo_size, Image.Resampling.LANCZOS)
+        for _, _, logo_size, _ in pending
+    }
 
-    if installer_type in ("pkg", "all"):
-        background = Image.new("RGBA", (1227, 600), (0, 0, 0, 0))
-        background.paste(logo.resize((148, 148)), (95, 418))
-        output = Path(outpath, "napari_1227x600.png")
-        background.save(output, format="png")
-        atexit.register(os.unlink, output)
+    def _make(output, size, logo_size, position):
+        background = Image.new("RGBA", size, (0, 0, 0, 0))
+        background.alpha_composite(logos[logo_size], position)
+        # tiny images; fast zlib settings cost only a few bytes
+        background.save(output, format="png", compress_level=1)
+
+    # resizing and PNG encoding release the GIL
+    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+        for future in [pool.submit(_make, *image) for image in pending]:
+            future.result()
+
+
+# the undocumented #!final comment is explained here
+# https://www.anaconda.com/blog/conda-configuration-engine-power-users
+CONDARC_TEMPLATE = (
+    "channels:  #!final\n"
+    "  - napari\n"
+    "  - conda-forge\n"
+    "{defaults}"
+    "repodata_fns:  #!final\n"
+    "  - repodata.json\n"
+    "auto_update_conda: false  #!final\n"
+    "notify_outdated_conda: false  #!final\n"
+    "channel_priority: strict  #!final\n"
+    "env_prompt: '[napari]({{default_env}}) '  #! final\n"
+)
 
 
-def _get_condarc():
+def _get_condarc(tmpdir):
     # we need defaults for tensorflow and others on windows only
-    defaults = "- defaults" if WINDOWS else ""
-    prompt = "[napari]({default_env}) "
-    contents = dedent(
-        f"""
-        channels:  #!final
-          - napari
-          - conda-forge
-          {defaults}
-        repodata_fns:  #!final
-          - repodata.json
-        auto_update_conda: false  #!final
-        notify_outdated_conda: false  #!final
-        channel_priority: strict  #!final
-        env_prompt: '{prompt}'  #! final
-        """
-    )
-    # the undocumented #!final comment is explained here
-    # https://www.anaconda.com/blog/conda-configuration-engine-power-users
-    with NamedTemporaryFile(delete=False, mode="w+") as f:
-        f.write(contents)
-    return f.name
+    defaults = "  - defaults\n" if WINDOWS else ""
+    path = os.path.join(tmpdir, "condarc")
+    with open(path, "w") as f:
+        f.write(CONDARC_TEMPLATE.format(defaults=defaults))
+    return path
 
 
-def _get_conda_meta_state():
+def _get_conda_meta_state(tmpdir):
     data = {
         "env_vars": {
             "QT_API": "pyside2",
         }
     }
-    with NamedTemporaryFile(delete=False, mode="w+") as f:
+    path = os.path.join(tmpdir, "state")
+    with open(path, "w") as f:
         json.dump(data, f)
-    atexit.register(os.unlink, f.name)
-    return f.name
+    return path
 
 
 def _base_env(python_version=PY_VER):
@@ -231,10 +375,12 @@ def _base_env(python_version=PY_VER):
 
 def _napari_env(
     python_version=PY_VER,
-    napari_version=_version(),
+    napari_version=None,
     pyside_version=PYSIDE_VER,
     extra_specs=None,
 ):
+    if napari_version is None:
+        napari_version = _version()
     return {
         "name": f"napari-{napari_version}",
         # "channels": same as _base_env(), omit to inherit :)
@@ -251,24 +397,29 @@ def _napari_env(
     }
 
 
-def _definitions(version=_version(), extra_specs=None, napari_repo=HERE):
+@lru_cache
+def _read_template(path):
+    return Path(path).read_text()
+
+
+def _definitions(tmpdir, version=None, extra_specs=None, napari_repo=HERE):
+    if version is None:
+        version = _version()
     resources = os.path.join(napari_repo, "resources")
     base_env = _base_env()
     napari_env = _napari_env(napari_version=version, extra_specs=extra_specs)
-    empty_file = NamedTemporaryFile(delete=False)
-    condarc = _get_condarc()
-    env_state = _get_conda_meta_state()
+    empty_file = os.path.join(tmpdir, "empty")
+    Path(empty_file).touch()
+    condarc = _get_condarc(tmpdir)
+    env_state = _get_conda_meta_state(tmpdir)
     env_state_path = os.path.join("envs", napari_env["name"], "conda-meta", "state")
+    default_path_stem = _installer_default_path_stem(version)
     definitions = {
-        "name": APP,
-        "company": "Napari",
-        "reverse_domain_identifier": "org.napari",
+        **STATIC_DEFINITIONS,
+        **PLATFORM_DEFINITIONS,
         "version": version.replace("+", "_"),
         "channels": base_env["channels"],
-        "conda_default_channels": ["conda-forge"],
-        "installer_filename": OUTPUT_FILENAME,
-        "initialize_conda": False,
-        "initialize_by_default": False,
+        "installer_filename": _output_filename(version),
         "license_file": os.path.join(resources, "bundle_license.rtf"),
         "specs": base_env["specs"],
         "extra_envs": {
@@ -277,10 +428,9 @@ def _definitions(version=_version(), extra_specs=None, napari_repo=HERE):
                 "menu_packages": ["napari-menu"],
             },
         },
-        "register_envs": False,
         "extra_files": [
             {os.path.join(resources, "bundle_readme.md"): "README.txt"},
-            {empty_file.name: ".napari_is_bundled_constructor"},
+            {empty_file: ".napari_is_bundled_constructor"},
             {condarc: ".condarc"},
             {env_state: env_state_path},
         ],
@@ -293,26 +443,22 @@ def _definitions(version=_version(), extra_specs=None, napari_repo=HERE):
         definitions["channels"].insert(0, "local")
     if LINUX:
         definitions["default_prefix"] = os.path.join(
-            "$HOME", ".local", INSTALLER_DEFAULT_PATH_STEM
+            "$HOME", ".local", default_path_stem
         )
         definitions["license_file"] = os.path.join(resources, "bundle_license.txt")
-        definitions["installer_type"] = "sh"
 
     if MACOS:
-        # These two options control the default install location:
+        # pkg_name and default_location_pkg (see PLATFORM_DEFINITIONS)
+        # control the default install location:
         # ~/<default_location_pkg>/<pkg_name>
-        definitions["pkg_name"] = INSTALLER_DEFAULT_PATH_STEM
-        definitions["default_location_pkg"] = "Library"
-        definitions["installer_type"] = "pkg"
-        definitions["progress_notifications"] = True
-        definitions["welcome_image"] = os.path.join(resources, "napari_1227x600.png")
-        welcome_text_tmpl = (Path(resources) / "osx_pkg_welcome.rtf.tmpl").read_text()
-        welcome_file = Path(resources) / "osx_pkg_welcome.rtf"
-        atexit.register(os.unlink, welcome_file)
+        definitions["pkg_name"] = default_path_stem
+        definitions["welcome_image"] = os.path.join(tmpdir, "napari_1227x600.png")
+        welcome_text_tmpl = _read_template(
+            os.path.join(resources, "osx_pkg_welcome.rtf.tmpl")
+        )
+        welcome_file = Path(tmpdir) / "osx_pkg_welcome.rtf"
         welcome_file.write_text(welcome_text_tmpl.replace("__VERSION__", version))
         definitions["welcome_file"] = str(welcome_file)
-        definitions["conclusion_text"] = ""
-        definitions["readme_text"] = ""
         signing_identity = os.environ.get("CONSTRUCTOR_SIGNING_IDENTITY")
         if signing_identity:
             definitions["signing_identity_name"] = signing_identity
@@ -321,27 +467,20 @@ def _definitions(version=_version(), extra_specs=None, napari_repo=HERE):
             definitions["notarization_identity_name"] = notarization_identity
 
     if WINDOWS:
-        definitions["conda_default_channels"].append("defaults")
         definitions.update(
             {
-                "welcome_image": os.path.join(resources, "napari_164x314.png"),
-                "header_image": os.path.join(resources, "napari_150x57.png"),
+                "welcome_image": os.path.join(tmpdir, "napari_164x314.png"),
+                "header_image": os.path.join(tmpdir, "napari_150x57.png"),
                 "icon_image": os.path.join(
                     napari_repo, "napari", "resources", "icon.ico"
                 ),
-                "register_python": False,
-                "register_python_default": False,
-                "default_prefix": os.path.join(
-                    "%LOCALAPPDATA%", INSTALLER_DEFAULT_PATH_STEM
-                ),
+                "default_prefix": os.path.join("%LOCALAPPDATA%", default_path_stem),
                 "default_prefix_domain_user": os.path.join(
-                    "%LOCALAPPDATA%", INSTALLER_DEFAULT_PATH_STEM
+                    "%LOCALAPPDATA%", default_path_stem
                 ),
                 "default_prefix_all_users": os.path.join(
-                    "%ALLUSERSPROFILE%", INSTALLER_DEFAULT_PATH_STEM
+                    "%ALLUSERSPROFILE%", default_path_stem
                 ),
-                "check_path_length": False,
-                "installer_type": "exe",
             }
         )
         signing_certificate = os.environ.get("CONSTRUCTOR_SIGNING_CERTIFICATE")
@@ -351,25 +490,34 @@ def _definitions(version=_version(), extra_specs=None, napari_repo=HERE):
     if definitions.get("welcome_image") or definitions.get("header_image"):
         _generate_background_images(
             definitions.get("installer_type", "all"),
-            outpath=resources,
+            outpath=tmpdir,
             napari_repo=napari_repo,
         )
 
-    atexit.register(os.unlink, "construct.yaml")
-    atexit.register(os.unlink, empty_file.name)
-    atexit.register(os.unlink, condarc)
-    atexit.register(os.unlink, env_state)
-
     return definitions
 
 
-def _constructor(version=_version(), extra_specs=None, napari_repo=HERE):
+@lru_cache
+def _constructor_exe():
+    constructor = which("constructor")
+    if not constructor:
+        raise RuntimeError("Constructor must be installed and in PATH.")
+    return constructor
+
+
+def _constructor(tmpdir, output_dir, version=None, extra_specs=None, napari_repo=HERE):
     """
     Create a temporary `construct.yaml` input file and
     run `constructor`.
 
     Parameters
     ----------
+    tmpdir: str
+        Scratch directory for `construct.yaml` and the files it references
+        (condarc, background images, etc). The caller owns its cleanup.
+    output_dir: str
+        Directory where `constructor` writes the installer and the
+        extra build outputs (lockfile, licenses).
     version: str
         Version of `napari` to be built. Defaults to the
         one detected by `importlib.metadata` (napari must be installed).
@@ -380,49 +528,62 @@ def _constructor(version=_version(), extra_specs=None, napari_repo=HERE):
     napari_repo: str
         location where the napari/napari repository was cloned
     """
-    constructor = which("constructor")
-    if not constructor:
-        raise RuntimeError("Constructor must be installed and in PATH.")
+    constructor = _constructor_exe()
+    if version is None:
+        version = _version()
 
+    # patched environment for constructor (and the diagnostics below)
+    env = {**os.environ, "CONDA_CHANNEL_PRIORITY": "strict"}
     # TODO: temporarily patching password - remove block when the secret has been fixed
     # (I think it contains an ending newline or something like that,
     # copypaste artifact?)
-    pfx_password = os.environ.get("CONSTRUCTOR_PFX_CERTIFICATE_PASSWORD")
+    pfx_password = env.get("CONSTRUCTOR_PFX_CERTIFICATE_PASSWORD")
     if pfx_password:
-        os.environ["CONSTRUCTOR_PFX_CERTIFICATE_PASSWORD"] = pfx_password.strip()
+        env["CONSTRUCTOR_PFX_CERTIFICATE_PASSWORD"] = pfx_password.strip()
 
     definitions = _definitions(
-        version=version, extra_specs=extra_specs, napari_repo=napari_repo
+        tmpdir, version=version, extra_specs=extra_specs, napari_repo=napari_repo
     )
 
-    args = [constructor, "-v", "."]
+    args = [constructor, "-v", tmpdir, "--output-dir", str(output_dir)]
 
     if TARGET_PLATFORM and CONDA_EXE:
         args += ["--platform", TARGET_PLATFORM, "--conda-exe", CONDA_EXE]
-    env = os.environ.copy()
-    env["CONDA_CHANNEL_PRIORITY"] = "strict"
+
+    # render once; the same text is echoed and written to disk
+    construct_yaml = _dump_yaml(definitions)
 
     print("+++++++++++++++++")
     print("Command:", " ".join(args))
     print("Configuration:")
-    yaml.dump(definitions, sys.stdout, transform=indent4)
-    print("\nConda config:\n")
-    print(
-        indent4(check_output(["conda", "config", "--show-sources"], text=True, env=env))
-    )
-    print("Conda info:")
-    print(indent4(check_output(["conda", "info"], text=True, env=env)))
+    print(indent4(construct_yaml))
+    if os.environ.get("CONSTRUCTOR_VERBOSE"):
+        from concurrent.futures import ThreadPoolExecutor
+
+        # independent subprocesses, so let them start conda in parallel
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            # same environment as constructor, so the dump shows what it sees
+            config = pool.submit(
+                check_output, ["conda", "config", "--show-sources"], text=True, env=env
+            )
+            info = pool.submit(check_output, ["conda", "info"], text=True, env=env)
+            print("\nConda config:\n")
+            print(indent4(config.result()))
+            print("Conda info:")
+            print(indent4(info.result()))
     print("+++++++++++++++++")
 
-    with open("construct.yaml", "w") as fin:
-        yaml.dump(definitions, fin)
+    with open(os.path.join(tmpdir, "construct.yaml"), "w", encoding="utf-8") as fin:
+        fin.write(construct_yaml)
 
     check_call(args, env=env)
 
-    return OUTPUT_FILENAME
+    return _output_filename(version)
 
 
 def licenses():
+    import zipfile
+
     info_path = Path("_work") / "licenses.json"
     if not info_path.is_file():
         sys.exit(
@@ -432,7 +593,11 @@ def licenses():
         )
 
     zipname = Path("_work") / f"licenses.{OS}-{ARCH}.zip"
-    with zipfile.ZipFile(zipname, mode="w", compression=zipfile.ZIP_DEFLATED) as ozip:
+    # licenses.json embeds every license text and can be several MB;
+    # a low deflate level is much cheaper and compresses almost as well
+    with zipfile.ZipFile(
+        zipname, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=3
+    ) as ozip:
         ozip.write(info_path)
     return zipname.resolve()
 
@@ -458,7 +623,8 @@ def lockfiles():
         if not local_channel.endswith("/"):
             local_channel += "/"
         remote_channel = "https://conda.anaconda.org/napari/"
-        if "rc" in _version() or "dev" in _version():
+        version = _version()
+        if "rc" in version or "dev" in version:
             remote_channel += "label/nightly/"
         contents = txtfile.read_text().replace(local_channel, remote_channel)
         txtfile.write_text(contents)
@@ -466,16 +632,22 @@ def lockfiles():
 
 
 def main(extra_specs=None, napari_repo=HERE):
-    try:
-        cwd = os.getcwd()
-        workdir = Path("_work")
-        workdir.mkdir(exist_ok=True)
-        os.chdir(workdir)
-        _constructor(extra_specs=extra_specs, napari_repo=napari_repo)
-        assert Path(OUTPUT_FILENAME).exists(), f"{OUTPUT_FILENAME} was not created!"
-    finally:
-        os.chdir(cwd)
-    return workdir / OUTPUT_FILENAME
+    # constructor gets explicit input and output directories instead of
+    # relying on the cwd, so no process-wide state is changed here
+    workdir = Path("_work").resolve()
+    workdir.mkdir(exist_ok=True)
+    version = _version()
+    with TemporaryDirectory(prefix="napari-installer-") as tmpdir:
+        _constructor(
+            tmpdir,
+            workdir,
+            version=version,
+            extra_specs=extra_specs,
+            napari_repo=napari_repo,
+        )
+    output = workdir / _output_filename(version)
+    assert output.exists(), f"{output.name} was not created!"
+    return output
 
 
 def cli(argv=None):
@@ -536,23 +708,27 @@ def cli(argv=None):
     return p.parse_args()
 
 
+# Single-flag queries the CI workflows run to compute variables.
+# They are answered before building the full argument parser.
+FAST_QUERIES = {
+    "--version": _version,
+    "--installer-version": lambda: INSTALLER_VERSION,
+    "--arch": lambda: ARCH,
+    "--ext": lambda: EXT,
+    "--artifact-name": _output_filename,
+}
+
+
 if __name__ == "__main__":
-    args = cli()
-    if args.version:
-        print(_version())
-        sys.exit()
-    if args.installer_version:
-        print(INSTALLER_VERSION)
-        sys.exit()
-    if args.arch:
-        print(ARCH)
-        sys.exit()
-    if args.ext:
-        print(EXT)
-        sys.exit()
-    if args.artifact_name:
-        print(OUTPUT_FILENAME)
+    if len(sys.argv) == 2 and sys.argv[1] in FAST_QUERIES:
+        print(FAST_QUERIES[sys.argv[1]]())
         sys.exit()
+    args = cli()
+    for flag, query in FAST_QUERIES.items():
+        # same table as the fast path; "--artifact-name" -> args.artifact_name
+        if getattr(args, flag[2:].replace("-", "_")):
+            print(query())
+            sys.exit()
     if args.licenses:
         print(licenses())
         sys.exit()
@@ -560,7 +736,7 @@ if __name__ == "__main__":
         print(lockfiles())
         sys.exit()
     if args.images:
-        _generate_background_images(napari_repo=args.location)
+        _generate_background_images("all", napari_repo=args.location)
         sys.exit()
 
     print("Created", main(extra_specs=args.extra_specs, napari_repo=args.location))
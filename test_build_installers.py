@@ -0,0 +1,83 @@
+"""Tests for the construct.yaml renderer in build_installers.py."""
+
+import json
+
+import pytest
+
+from build_installers import PLATFORM_DEFINITIONS, STATIC_DEFINITIONS, _dump_yaml
+
+yaml = pytest.importorskip("yaml")
+
+
+def _roundtrip(data):
+    loaded = yaml.safe_load(_dump_yaml(data))
+    # tuples are rendered as sequences and load back as lists
+    assert loaded == json.loads(json.dumps(data))
+
+
+def test_static_definitions():
+    _roundtrip({**STATIC_DEFINITIONS, **PLATFORM_DEFINITIONS})
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "",
+        "C:\\Users\\napari\\AppData\\Local\\napari-0.5.0",
+        "%LOCALAPPDATA%\\napari-0.5.0",
+        "$HOME/.local/napari-0.5.0",
+        "yes",
+        "null",
+        "0.5.0",
+        "1e3",
+        "- not a list item",
+        "key: value",
+        "# not a comment",
+        "'quoted' \"text\"",
+        "[napari](default_env) ",
+        "multi\nline",
+        "ünïcödé",
+        "C:/Users/\U0001f600/x",
+        "line\x85next\u2028and\u2029more",
+        "\x7f\x9f\ufeff\ufffe",
+        True,
+        False,
+        None,
+        0,
+        1.5,
+    ],
+)
+def test_scalars(value):
+    _roundtrip({"value": value, "values": [value]})
+
+
+@pytest.mark.parametrize(
+    "key",
+    ["yes", "No", "on", "OFF", "true", "null", "y", "n", "1", "with space", ""],
+)
+def test_reserved_keys(key):
+    _roundtrip({key: "value"})
+
+
+def test_nested_structures():
+    _roundtrip(
+        {
+            "extra_envs": {
+                "napari-0.5.0": {
+                    "specs": ["python=3.11.*=*_cpython", "napari=0.5.0"],
+                    "menu_packages": ("napari-menu",),
+                },
+            },
+            "extra_files": [
+                {"C:\\tmp\\empty": ".napari_is_bundled_constructor"},
+                {"/tmp/condarc": ".condarc"},
+            ],
+            "build_outputs": [
+                {"lockfile": {"env": "napari-0.5.0"}},
+                {"licenses": {"include_text": True, "text_errors": "replace"}},
+            ],
+            "nested_lists": [["a", "b"], [], [{"c": []}]],
+            "empty_list": [],
+            "empty_dict": {},
+        }
+    )